@@ -1,29 +1,45 @@
 from typing import TypedDict, Literal, Annotated ,List
 import operator
-from langgraph.graph import StateGraph, END
-from extractor import extract_invoice_from_text, InvoiceData
+from functools import lru_cache
+from extractor import extract_invoice_from_text, InvoiceData, text_hash
+from compactor import compact_invoice_text
+from audit_log import log_event
 from validator import validate_invoice, ValidationResult
 
 
 class AgentState(TypedDict):
+    invoice_id: str
     invoice_text: str         
     extracted_data: InvoiceData | None 
     validation_result: ValidationResult | None
     final_decision: str       
     retry_count: int
     analysis_notes: List[str]  
+    compaction: dict | None
 
 
+def _invoice_id(state):
+    """Audit key: the caller's invoice_id (filename#sha12 from make_invoice_id), else a hash of the text."""
+    return state.get("invoice_id") or text_hash(state["invoice_text"])[:12]
+
 
 def extract_node(state: AgentState):
     """Worker 1: Reads the invoice (Single Attempt)."""
     print(f"🤖 Agent: Reading invoice...")
+    compaction = compact_invoice_text(state["invoice_text"])
+    print(f"🗜️ Compacted text: {compaction.original_tokens} → {compaction.compacted_tokens} tokens (ratio {compaction.ratio})")
+    stats = compaction.model_dump(exclude={"text"})
     try:
-        data = extract_invoice_from_text(state["invoice_text"])
-        return {"extracted_data": data}
+        data = extract_invoice_from_text(compaction.text, source_text=state["invoice_text"])
     except Exception as e:
         print(f"❌ Extraction Error: {e}")
-        return {"extracted_data": None}
+        data = None
+
+    if data:
+        log_event(_invoice_id(state), "EXTRACTED", f"{data.vendor_name} / {data.po_number} / {data.total_amount} {data.currency}")
+    else:
+        log_event(_invoice_id(state), "EXTRACTION_FAILED", f"{compaction.compacted_tokens} tokens sent")
+    return {"extracted_data": data, "compaction": stats}
 
 def validate_node(state: AgentState):
     """Worker 2: Checks the database."""
@@ -37,6 +53,10 @@ def validate_node(state: AgentState):
         }
 
     result = validate_invoice(data)
+    if result.is_valid:
+        log_event(_invoice_id(state), "VALIDATION_PASSED", result.status)
+    else:
+        log_event(_invoice_id(state), "VALIDATION_FAILED", "; ".join(result.errors))
     return {
         "validation_result": result,
         "analysis_notes": result.errors if not result.is_valid else []
@@ -48,33 +68,49 @@ def decision_node(state: AgentState):
     
     if result is None:
         print("❌ Agent: Fatal Extraction Error.")
+        log_event(_invoice_id(state), "DECISION_REJECTED", "Extraction Failed")
         return {"final_decision": "REJECTED"} 
     
     if result.is_valid:
         if any("High Value" in e for e in result.errors):
             print("⚖️ Agent: Invoice valid but exceeds auto-pay limit. FLAGGING.")
+            log_event(_invoice_id(state), "DECISION_FLAG", "Exceeds auto-pay limit")
             return {"final_decision": "FLAG"}
         
         print("✅ Agent: Invoice APPROVED.")
+        log_event(_invoice_id(state), "DECISION_PAY", "All rules passed")
         return {"final_decision": "PAY"}
     
     else:
         print(f"❌ Agent: Invoice REJECTED. Reasons: {result.errors}")
+        log_event(_invoice_id(state), "DECISION_REJECTED", "; ".join(result.errors))
         return {"final_decision": "REJECTED"}
 
 
-workflow = StateGraph(AgentState)
-workflow.add_node("extract", extract_node)
-workflow.add_node("validate", validate_node)
-workflow.add_node("decide", decision_node)
+@lru_cache(maxsize=None)
+def get_app():
+    """Builds and compiles the LangGraph workflow on first use."""
+    from langgraph.graph import StateGraph, END
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("extract", extract_node)
+    workflow.add_node("validate", validate_node)
+    workflow.add_node("decide", decision_node)
+
+
+    workflow.set_entry_point("extract")
+    workflow.add_edge("extract", "validate")
+    workflow.add_edge("validate", "decide")
+    workflow.add_edge("decide", END)
 
+    return workflow.compile()
 
-workflow.set_entry_point("extract")
-workflow.add_edge("extract", "validate")
-workflow.add_edge("validate", "decide")
-workflow.add_edge("decide", END)
 
-app = workflow.compile()
+def __getattr__(name):
+    # Keeps `from agent import app` working without paying for langgraph at import time.
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
     test_invoice_text = """
@@ -85,6 +121,6 @@ if __name__ == "__main__":
     """
 
     print("🚀 Starting Robust AI Agent...")
-    result = app.invoke({"invoice_text": test_invoice_text, "retry_count": 0})
+    result = get_app().invoke({"invoice_text": test_invoice_text, "retry_count": 0})
     
     print(f"\nFinal Decision: {result['final_decision']}")
\ No newline at end of file
@@ -1,17 +1,125 @@
 import streamlit as st
 import os
+import io
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from pypdf import PdfReader
 from dotenv import load_dotenv
-from agent import app as agent_app
+from agent import get_app
+from extractor import configured_backends, requires_api_key
+from audit_log import get_audit_writer, get_invoice_history, invoice_id_from_digest
 
 load_dotenv()
 api_key = os.getenv("GEMINI_API_KEY")
+# Rules / replay backends run offline, so the Gemini key is only needed if gemini can be selected.
+needs_api_key = requires_api_key()
+MAX_WORKERS = int(os.getenv("APP_MAX_WORKERS", 4))
+RESULT_TTL = int(os.getenv("APP_RESULT_TTL", 600))
 
 st.set_page_config(page_title="Senitac AI Agent", page_icon="🤖", layout="wide")
 
+
+@st.cache_resource
+def get_executor():
+    """One worker pool per server process, shared by every session."""
+    return ThreadPoolExecutor(max_workers=MAX_WORKERS)
+
+
+@st.cache_data(show_spinner=False)
+def read_pdf_text(file_hash, _file_bytes):
+    """Parses the PDF in memory. Cached per file hash, so reruns skip the parse."""
+    reader = PdfReader(io.BytesIO(_file_bytes))
+    text = ""
+    for page in reader.pages:
+        text += page.extract_text()
+    return text
+
+
+@st.cache_data(show_spinner=False, ttl=RESULT_TTL)
+def run_agent(file_hash, invoice_id, _invoice_text):
+    """
+    Runs the LangGraph agent once per invoice (file hash + filename, so every
+    name a file is uploaded under gets its own audit history). Results expire after APP_RESULT_TTL
+    seconds so decisions are re-checked against current POs.
+    """
+    final_state = get_app().invoke({"invoice_id": invoice_id, "invoice_text": _invoice_text, "retry_count": 0})
+    if final_state["extracted_data"] is None:
+        # Raising keeps st.cache_data from storing the failure, so a retry calls the agent again.
+        raise RuntimeError("Extraction failed (API error or unreadable invoice). Clear results and retry.")
+    return final_state
+
+
+def process_invoice(file_hash, invoice_id, file_bytes):
+    """Worker job: parse the PDF, then run the agent. Errors surface through the future."""
+    try:
+        text = read_pdf_text(file_hash, file_bytes)
+    except Exception as e:
+        raise RuntimeError(f"Corrupt PDF: {e}") from e
+    return run_agent(file_hash, invoice_id, text)
+
+
+def file_digest(uploaded_file):
+    """SHA-256 of an upload, computed once per file and kept for the session's polling reruns."""
+    digests = st.session_state.setdefault("digests", {})
+    key = getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+    if key not in digests:
+        digests[key] = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    return digests[key]
+
+
+def render_result(final_state, invoice_id=None):
+    decision = final_state["final_decision"]
+    data = final_state["extracted_data"]
+    validation = final_state["validation_result"]
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("📄 Extracted Data")
+        if data:
+            st.json(data.model_dump())
+        else:
+            st.error("Could not extract data.")
+
+    with col2:
+        st.subheader("⚖️ Final Decision")
+        if decision == "PAY":
+            st.success(f"## ✅ APPROVED")
+            st.write("Invoice matched PO and Vendor rules.")
+        elif decision == "DENY":
+            st.error(f"## ❌ REJECTED")
+            if validation:
+                for error in validation.errors:
+                    st.write(f"- {error}")
+        else:
+            st.warning("## ⚠️ HUMAN REVIEW NEEDED")
+
+    compaction = final_state.get("compaction")
+    if compaction:
+        st.caption(
+            f"🗜️ Prompt text: {compaction['original_tokens']} → {compaction['compacted_tokens']} tokens "
+            f"(ratio {compaction['ratio']})"
+        )
+
+    st.divider()
+    st.subheader("📜 Agent Audit Log")
+    if invoice_id:
+        # Flush once per newly shown invoice, not on every polling rerun.
+        if st.session_state.get("audit_flushed_for") != invoice_id:
+            if get_audit_writer().flush(timeout=2.0):
+                st.session_state["audit_flushed_for"] = invoice_id
+            else:
+                st.caption("⏳ Audit history is still being written; refresh to see the latest events.")
+        st.dataframe(get_invoice_history(invoice_id), use_container_width=True)
+    else:
+        st.write(f"Processed via LangGraph Node: {list(final_state.keys())}")
+
+
 st.sidebar.title("🔧 Agent Controls")
 
-if api_key:
+if not needs_api_key:
+    st.sidebar.info(f"🔌 Offline extraction: {', '.join(sorted(configured_backends()))} (no API key needed)")
+elif api_key:
     st.sidebar.success("✅ API Key Loaded from .env")
 else:
     st.sidebar.error("⚠️ No API Key found!")
@@ -20,56 +128,78 @@ else:
         os.environ["GEMINI_API_KEY"] = api_key
 
 st.title("🤖 AI Accounts Payable Employee")
-st.markdown("### Upload an Invoice to begin the 3-Way Match")
-
-uploaded_file = st.file_uploader("Drop your PDF Invoice here", type=["pdf"])
-
-if uploaded_file:
-    with st.spinner("👀 Reading PDF..."):
-        with open("temp_invoice.pdf", "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        
-        reader = PdfReader("temp_invoice.pdf")
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text()
-            
-        st.success("PDF Read Successfully!")
-        with st.expander("See Raw Text"):
-            st.text(text)
-
-    if st.button("🚀 Process Invoice"):
-        if not api_key:
+st.markdown("### Upload Invoices to begin the 3-Way Match")
+
+# invoice_id -> {"name", "future", "started"}
+jobs = st.session_state.setdefault("jobs", {})
+
+uploaded_files = st.file_uploader("Drop your PDF Invoices here", type=["pdf"], accept_multiple_files=True)
+
+files = {}
+for uploaded_file in uploaded_files or []:
+    file_hash = file_digest(uploaded_file)
+    invoice_id = invoice_id_from_digest(file_hash, uploaded_file.name)
+    files[invoice_id] = (uploaded_file.name, uploaded_file, file_hash)
+
+if files:
+    st.success(f"{len(files)} PDF(s) ready.")
+
+    if st.button("🚀 Process Invoices"):
+        if needs_api_key and not api_key:
             st.error("❌ Critical Error: No API Key provided. Agent cannot work.")
         else:
-            with st.spinner("🤖 Agent is thinking... (Checking Database & Rules)"):
-                final_state = agent_app.invoke({"invoice_text": text})
-                decision = final_state["final_decision"]
-                data = final_state["extracted_data"]
-                validation = final_state["validation_result"]
-                col1, col2 = st.columns(2)
-
-                with col1:
-                    st.subheader("📄 Extracted Data")
-                    if data:
-                        st.json(data.model_dump())
-                    else:
-                        st.error("Could not extract data.")
-
-                with col2:
-                    st.subheader("⚖️ Final Decision")
-                    if decision == "PAY":
-                        st.balloons()
-                        st.success(f"## ✅ APPROVED")
-                        st.write("Invoice matched PO and Vendor rules.")
-                    elif decision == "DENY":
-                        st.error(f"## ❌ REJECTED")
-                        if validation:
-                            for error in validation.errors:
-                                st.write(f"- {error}")
-                    else:
-                        st.warning("## ⚠️ HUMAN REVIEW NEEDED")
-
-                st.divider()
-                st.subheader("📜 Agent Audit Log")
-                st.write(f"Processed via LangGraph Node: {list(final_state.keys())}")
\ No newline at end of file
+            executor = get_executor()
+            for invoice_id, (name, uploaded_file, file_hash) in files.items():
+                if invoice_id in jobs:
+                    continue
+                jobs[invoice_id] = {
+                    "name": name,
+                    "future": executor.submit(process_invoice, file_hash, invoice_id, uploaded_file.getvalue()),
+                    "started": time.time(),
+                }
+
+if jobs:
+    rows = []
+    pending = 0
+    for invoice_id, job in jobs.items():
+        future = job["future"]
+        if not future.done():
+            pending += 1
+            status, decision = "⏳ Processing", ""
+        elif future.exception():
+            status, decision = "❌ Error", str(future.exception())
+        else:
+            status, decision = "✅ Done", future.result()["final_decision"]
+        rows.append({
+            "File": job["name"],
+            "Status": status,
+            "Decision": decision,
+            "Elapsed (s)": round(time.time() - job["started"], 1) if not future.done() else "",
+        })
+
+    st.subheader(f"📊 Progress: {len(jobs) - pending}/{len(jobs)} complete")
+    st.progress((len(jobs) - pending) / len(jobs))
+    st.dataframe(rows, use_container_width=True)
+
+    finished = {h: j for h, j in jobs.items() if j["future"].done() and not j["future"].exception()}
+    if finished:
+        selected = st.selectbox(
+            "Review invoice",
+            list(finished.keys()),
+            format_func=lambda h: finished[h]["name"],
+        )
+        if selected in files:
+            with st.expander("See Raw Text"):
+                name, uploaded_file, file_hash = files[selected]
+                st.text(read_pdf_text(file_hash, uploaded_file.getvalue()))
+        render_result(finished[selected]["future"].result(), selected)
+
+    if st.button("🧹 Clear Results"):
+        # st.cache_data can only be cleared per function, so this drops cached results for all sessions.
+        run_agent.clear()
+        st.session_state["jobs"] = {}
+        st.rerun()
+
+    if pending:
+        time.sleep(1)
+        st.rerun()
@@ -0,0 +1,198 @@
+import sqlite3
+import threading
+import queue
+import time
+import atexit
+import os
+import hashlib
+from datetime import datetime, timezone
+
+DB_PATH = 'ap_database.db'
+BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", 500))
+FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", 1.0))
+
+# Composite indexes cover "history for an invoice", "all X actions in a window"
+# and plain time-range scans without touching the table rows for ordering.
+AUDIT_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_audit_invoice_ts ON audit_log (invoice_id, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_audit_action_ts ON audit_log (action, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_audit_ts ON audit_log (timestamp)",
+]
+
+
+def create_audit_indexes(cursor):
+    for statement in AUDIT_INDEXES:
+        cursor.execute(statement)
+
+
+def _now():
+    # Same layout as SQLite's CURRENT_TIMESTAMP (UTC) plus milliseconds, so string ranges sort correctly.
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+# --- 1. WRITER ---
+class AuditWriter:
+    """
+    Queues audit events and writes them from a background thread.
+    A batch is collected for up to `flush_interval` seconds after its first event,
+    or until `batch_size` events, then inserted with executemany in a single
+    transaction. flush() and close() end the current batch early.
+    """
+
+    def __init__(self, db_path=DB_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._stop = object()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def log(self, invoice_id, action, reason=""):
+        """Non-blocking: the caller never waits on SQLite."""
+        self._queue.put((str(invoice_id), action, str(reason), _now()))
+
+    def flush(self, timeout=None):
+        """
+        Waits until every event queued before this call has been written.
+        Events logged afterwards are not waited for. Returns False on timeout.
+        """
+        if not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(self._stop)
+            self._thread.join()
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            # WAL lets validation reads proceed while a batch is being written.
+            conn.execute("PRAGMA journal_mode=WAL")
+            create_audit_indexes(conn.cursor())
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Audit Log setup failed: {e}")
+
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = []
+            flushed = []  # flush() markers to release once this batch is committed
+            deadline = time.monotonic() + self.flush_interval
+            item = first
+            while True:
+                if item is self._stop:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    flushed.append(item)
+                else:
+                    batch.append(item)
+                if stopping or flushed or len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            self._write(conn, batch)
+            for done in flushed:
+                done.set()
+
+        conn.close()
+
+    def _write(self, conn, batch):
+        if not batch:
+            return
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO audit_log (invoice_id, action, reason, timestamp) VALUES (?, ?, ?, ?)",
+                    batch,
+                )
+        except sqlite3.Error as e:
+            print(f"❌ Audit Log write failed ({len(batch)} events dropped): {e}")
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_audit_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = AuditWriter()
+            atexit.register(_writer.close)
+    return _writer
+
+
+def log_event(invoice_id, action, reason=""):
+    get_audit_writer().log(invoice_id, action, reason)
+
+
+def make_invoice_id(content, filename):
+    """
+    Audit key for one invoice document: filename plus a short content hash, so
+    unrelated files that share a name (e.g. "invoice.pdf") get separate histories.
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return invoice_id_from_digest(hashlib.sha256(content).hexdigest(), filename)
+
+
+def invoice_id_from_digest(digest, filename):
+    """Same as make_invoice_id, for callers that already hold the SHA-256 hex digest."""
+    return f"{filename}#{digest[:12]}"
+
+
+# --- 2. QUERY API ---
+def query_audit_log(invoice_id=None, action=None, start=None, end=None, limit=1000, db_path=DB_PATH):
+    """
+    Returns audit rows (oldest first) filtered by invoice, action and/or time range.
+    `start` / `end` are inclusive 'YYYY-MM-DD[ HH:MM[:SS[.mmm]]]' strings in UTC;
+    a less precise `end` covers the whole day / minute / second it names.
+    """
+    clauses = []
+    params = []
+    if invoice_id is not None:
+        clauses.append("invoice_id = ?")
+        params.append(str(invoice_id))
+    if action is not None:
+        clauses.append("action = ?")
+        params.append(action)
+    if start is not None:
+        clauses.append("timestamp >= ?")
+        params.append(start)
+    if end is not None:
+        # Rows carry milliseconds, so pad a coarser `end` to the last instant it covers.
+        clauses.append("timestamp <= ?")
+        params.append(end + "9999-99-99 99:99:99.999"[len(end):])
+
+    sql = "SELECT id, invoice_id, action, reason, timestamp FROM audit_log"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY timestamp, id LIMIT ?"
+    params.append(limit)
+
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in conn.execute(sql, params).fetchall()]
+    finally:
+        conn.close()
+
+
+def get_invoice_history(invoice_id, db_path=DB_PATH):
+    return query_audit_log(invoice_id=invoice_id, limit=-1, db_path=db_path)
@@ -0,0 +1,69 @@
+import csv
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+HISTORY_FILE = "startup_benchmark.csv"
+
+# Cumulative import time budget (ms) per entry point, measured with `python -X importtime`.
+BUDGETS_MS = {
+    "setup_db": 50,
+    "email_listener": 400,
+    "agent": 600,
+    "validator": 500,
+}
+
+
+def measure_import_ms(module):
+    """
+    Imports `module` in a fresh interpreter and returns its cumulative import time in ms.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    # Lines look like: "import time:   self [us] |  cumulative | imported package"
+    for line in proc.stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000.0
+    raise RuntimeError(f"No importtime entry for {module}")
+
+
+def run_benchmark():
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    file_exists = os.path.isfile(HISTORY_FILE)
+    over_budget = []
+
+    with open(HISTORY_FILE, mode='a', newline='') as f:
+        writer = csv.writer(f)
+        if not file_exists:
+            writer.writerow(["Timestamp", "Module", "Import ms", "Budget ms", "Status"])
+
+        for module, budget in BUDGETS_MS.items():
+            try:
+                elapsed = measure_import_ms(module)
+            except RuntimeError as e:
+                print(f"❌ {module}: {e}")
+                over_budget.append(module)
+                continue
+
+            status = "OK" if elapsed <= budget else "OVER"
+            icon = "✅" if status == "OK" else "❌"
+            print(f"{icon} {module}: {elapsed:.1f} ms (budget {budget} ms)")
+            writer.writerow([timestamp, module, f"{elapsed:.1f}", budget, status])
+            if status == "OVER":
+                over_budget.append(module)
+
+    print(f"📒 Results appended to {HISTORY_FILE}")
+    return over_budget
+
+
+if __name__ == "__main__":
+    sys.exit(1 if run_benchmark() else 0)
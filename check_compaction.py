@@ -0,0 +1,69 @@
+import os
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+
+from createpdf import SCENARIOS, create_invoice
+from compactor import compact_invoice_text
+from extractor import RulesBackend
+
+# Appended to each invoice to mimic multi-page statements with terms and conditions.
+PADDING = "\n".join(
+    [f"Page {page} of 4\nTerms and Conditions apply to all orders.\n"
+     + "\n".join(f"Clause {page}.{n}: goods remain the property of the seller until paid in full." for n in range(40))
+     for page in range(2, 5)]
+)
+TOKEN_BUDGET = 200
+
+
+def pdf_text(scenario, folder):
+    """Renders the scenario with createpdf.py and reads it back the way email_listener does."""
+    from pypdf import PdfReader
+
+    path = os.path.join(folder, scenario["filename"])
+    with redirect_stdout(StringIO()):
+        create_invoice(**{**scenario, "filename": path})
+    text = ""
+    for page in PdfReader(path).pages:
+        text += page.extract_text()
+    return text
+
+
+def run_check():
+    """
+    Extracts every createpdf.py scenario from raw and compacted text with the rules
+    backend and reports any field that differs. Returns the number of mismatches.
+    """
+    backend = RulesBackend()
+    failures = 0
+
+    with tempfile.TemporaryDirectory() as folder:
+        for scenario in SCENARIOS:
+            raw = pdf_text(scenario, folder)
+            expected = backend.extract(raw)
+            if (expected.vendor_name, expected.po_number, expected.total_amount) != (
+                scenario["vendor"], scenario["po_number"], scenario["total"]
+            ):
+                print(f"❌ {scenario['filename']}: raw text extracted as {expected}")
+                failures += 1
+                continue
+
+            for label, text in [("plain", raw), ("padded", raw + "\n" + PADDING)]:
+                compaction = compact_invoice_text(text, token_budget=TOKEN_BUDGET)
+                try:
+                    actual = backend.extract(compaction.text, source_text=text)
+                except ValueError as e:
+                    actual = e
+                status = "✅" if actual == expected else "❌"
+                print(f"{status} {scenario['filename']} ({label}): "
+                      f"{compaction.original_tokens} → {compaction.compacted_tokens} tokens (ratio {compaction.ratio})")
+                if actual != expected:
+                    print(f"   expected {expected}\n   got      {actual}")
+                    failures += 1
+
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if run_check() else 0)
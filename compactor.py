@@ -0,0 +1,108 @@
+import os
+import re
+from pydantic import BaseModel
+
+# Rough size of one LLM token in characters (English text / numbers).
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = int(os.getenv("EXTRACTION_TOKEN_BUDGET", 1500))
+
+# --- 1. DEFINE THE RESULT ---
+class CompactionResult(BaseModel):
+    text: str
+    original_tokens: int
+    compacted_tokens: int
+    ratio: float  # compacted / original
+
+# --- 2. LINE CLASSIFIERS ---
+BOILERPLATE_PATTERNS = [
+    r"thank you for your (business|order)",
+    r"terms\s*(and|&)\s*conditions",
+    r"^page \d+( of \d+)?$",
+    r"^please retain (this|a copy)",
+    r"^please contact us (with|if you have) (any )?(questions|queries)",
+    r"late (payment|fee)s?",
+    r"interest (will be|is) charged",
+    r"all rights reserved",
+    r"this (is a )?computer[- ]generated",
+    r"^(www\.|https?://)",
+]
+# Payee lines ("Please make checks payable to <Vendor>", "Remit to: <Vendor>") are often
+# the only place the vendor name appears, so they are never treated as boilerplate.
+PAYEE_PATTERNS = [
+    r"\b(payable to|remit(tance)?( to| address)?)\b",
+]
+HEADER_PATTERNS = PAYEE_PATTERNS + [
+    r"invoice",
+    r"\b(from|vendor|bill to|bill from|sold by)\b",
+    r"\bdate\b",
+    r"\bP\.?O\.?\b",
+    r"\b(currency|usd|inr|eur|gbp)\b",
+]
+TOTAL_PATTERNS = [
+    r"\b(total|subtotal|amount due|balance due|tax|vat|gst)\b",
+]
+AMOUNT_PATTERN = r"[$₹€£]\s?[\d,]+(\.\d+)?|\b\d[\d,]*\.\d{2}\b"
+
+
+def estimate_tokens(text):
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN) if text else 0
+
+
+def _matches(line, patterns):
+    return any(re.search(p, line, re.IGNORECASE) for p in patterns)
+
+
+def _line_priority(line):
+    """0 = totals, 1 = header, 2 = line items, 3 = everything else."""
+    if _matches(line, TOTAL_PATTERNS):
+        return 0
+    if _matches(line, HEADER_PATTERNS):
+        return 1
+    if re.search(AMOUNT_PATTERN, line):
+        return 2
+    return 3
+
+# --- 3. COMPACTION ---
+def compact_invoice_text(invoice_text, token_budget=None):
+    """
+    Strips boilerplate and redundant whitespace from invoice text, then caps it
+    to `token_budget` by keeping totals, header and line-item lines first.
+    Kept lines stay in their original order.
+    """
+    token_budget = token_budget or DEFAULT_TOKEN_BUDGET
+    original_tokens = estimate_tokens(invoice_text)
+
+    lines = []
+    seen = set()
+    for raw in invoice_text.splitlines():
+        line = re.sub(r"\s+", " ", raw).strip()
+        if not line:
+            continue
+        if _matches(line, BOILERPLATE_PATTERNS) and not _matches(line, PAYEE_PATTERNS):
+            continue
+        # Multi-page statements repeat headers/footers on every page.
+        if line in seen and _line_priority(line) != 2:
+            continue
+        seen.add(line)
+        lines.append(line)
+
+    text = "\n".join(lines)
+    if estimate_tokens(text) > token_budget:
+        ranked = sorted(range(len(lines)), key=lambda i: (_line_priority(lines[i]), i))
+        keep = set()
+        used = 0
+        for i in ranked:
+            cost = estimate_tokens(lines[i]) + 1
+            if used + cost > token_budget:
+                continue
+            keep.add(i)
+            used += cost
+        text = "\n".join(lines[i] for i in sorted(keep))
+
+    compacted_tokens = estimate_tokens(text)
+    return CompactionResult(
+        text=text,
+        original_tokens=original_tokens,
+        compacted_tokens=compacted_tokens,
+        ratio=round(compacted_tokens / original_tokens, 3) if original_tokens else 1.0,
+    )
@@ -41,59 +41,65 @@ def create_invoice(filename, vendor, date, po_number, items, total, notes=""):
     pdf.output(filename)
     print(f"✅ Created: {filename}")
 
-if __name__ == "__main__":
-    
+
+SCENARIOS = [
     # 1. THE AUTO-PAY (Matches PO-002, Under $1k limit)
-    create_invoice(
+    dict(
         filename="invoice_autopay.pdf",
         vendor="Office Coffee Co",
         date="2024-02-12",
         po_number="PO-002",
         items=[("100kg Premium Coffee Beans", 500.00)],
         total=500.00,
-        notes="Recurring monthly order."
-    )
+        notes="Recurring monthly order.",
+    ),
 
     # 2. THE HIGH VALUE (Matches PO-001, but > $1k limit)
-    create_invoice(
+    dict(
         filename="invoice_high_value.pdf",
         vendor="TechSupplies Ltd",
         date="2024-02-12",
         po_number="PO-001",
         items=[("5x MacBook Pro M3", 5000.00)],
         total=5000.00,
-        notes="Equipment for Engineering Team."
-    )
+        notes="Equipment for Engineering Team.",
+    ),
 
     # 3. THE PRICE SPIKE (Matches PO-001, but price is way off)
-    create_invoice(
+    dict(
         filename="invoice_anomaly.pdf",
         vendor="TechSupplies Ltd",
         date="2024-02-12",
         po_number="PO-001",
         items=[("5x MacBook Pro M3 (Gold Plated)", 9000.00)],
         total=9000.00,
-        notes="Special request upgrade."
-    )
+        notes="Special request upgrade.",
+    ),
 
     # 4. THE FRAUD (Vendor not in DB)
-    create_invoice(
+    dict(
         filename="invoice_fraud.pdf",
         vendor="Evil Corp LLC",
         date="2024-02-12",
         po_number="PO-001",
         items=[("Consulting Services", 1000.00)],
         total=1000.00,
-        notes="Wire transfer immediately."
-    )
+        notes="Wire transfer immediately.",
+    ),
 
     # 5. THE PO MISMATCH (Vendor OK, Price OK, but PO is wrong)
-    create_invoice(
+    dict(
         filename="invoice_bad_po.pdf",
         vendor="Office Coffee Co",
         date="2024-02-12",
         po_number="PO-999",
         items=[("Coffee Beans", 1000.00)],
         total=1000.00,
-        notes="Urgent order."
-    )
\ No newline at end of file
+        notes="Urgent order.",
+    ),
+]
+
+
+if __name__ == "__main__":
+    for scenario in SCENARIOS:
+        create_invoice(**scenario)
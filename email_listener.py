@@ -5,12 +5,10 @@ import os
 import time
 import shutil
 from dotenv import load_dotenv
-from pypdf import PdfReader
-from agent import app as agent_app 
-import requests
 import json
-from payment_manager import process_payment
-from accounting_sync import log_to_ledger
+
+# Heavy dependencies (agent -> langchain/langgraph, stripe, pypdf, requests)
+# are imported inside the functions that use them to keep startup fast.
 
 
 load_dotenv() 
@@ -20,20 +18,22 @@ IMAP_SERVER = "imap.gmail.com"
 SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL") 
 
 
-if not SLACK_WEBHOOK_URL:
-    print("❌ CRITICAL WARNING: SLACK_WEBHOOK_URL is missing. Alerts will fail.")
-else:
-    print("✅ Slack Configuration Loaded.")
-
-
 INPUT_DIR = "./invoices_input"
 PAID_DIR = "./processed/paid"
 FAILED_PAY_DIR = "./processed/failed_payments"
 FLAGGED_DIR = "./processed/flagged"
 
-for folder in [INPUT_DIR, PAID_DIR, FLAGGED_DIR, FAILED_PAY_DIR]:
-    if not os.path.exists(folder):
-        os.makedirs(folder)
+
+def init():
+    """Checks Slack config and creates the working folders. Call once before processing."""
+    if not SLACK_WEBHOOK_URL:
+        print("❌ CRITICAL WARNING: SLACK_WEBHOOK_URL is missing. Alerts will fail.")
+    else:
+        print("✅ Slack Configuration Loaded.")
+
+    for folder in [INPUT_DIR, PAID_DIR, FLAGGED_DIR, FAILED_PAY_DIR]:
+        if not os.path.exists(folder):
+            os.makedirs(folder)
 
 
 
@@ -56,6 +56,7 @@ def send_slack_alert(filename, reason, details):
     }
     
     try:
+        import requests
         response = requests.post(SLACK_WEBHOOK_URL, json=payload)
         if response.status_code == 200:
             print("✅ Slack Alert Sent Successfully.")
@@ -72,6 +73,7 @@ def send_slack_payment_error(filename, error_msg):
         "text": f"❌ *Payment Gateway Error*\n*File:* `{filename}`\n*Error:* `{error_msg}`"
     }
     try:
+        import requests
         requests.post(SLACK_WEBHOOK_URL, json=payload)
         print("✅ Payment Error Alert Sent.")
     except Exception as e:
@@ -79,6 +81,7 @@ def send_slack_payment_error(filename, error_msg):
 
 def get_pdf_text(filepath):
     try:
+        from pypdf import PdfReader
         with open(filepath, 'rb') as f:
             reader = PdfReader(f)
             text = ""
@@ -100,14 +103,24 @@ def move_file(filepath, dest_folder):
 
 
 def process_attachment(filepath):
-    print(f"🚀 AI Agent Activated for: {os.path.basename(filepath)}")
+    from agent import get_app
+    from payment_manager import process_payment
+    from accounting_sync import log_to_ledger
+    from audit_log import log_event, make_invoice_id
+
+    with open(filepath, 'rb') as f:
+        invoice_id = make_invoice_id(f.read(), os.path.basename(filepath))
+    print(f"🚀 AI Agent Activated for: {invoice_id}")
+    log_event(invoice_id, "RECEIVED", filepath)
     
     # 1. READ
     text = get_pdf_text(filepath)
-    if not text: return
+    if not text:
+        log_event(invoice_id, "PDF_UNREADABLE", filepath)
+        return
 
     # 2. THINK
-    result = agent_app.invoke({"invoice_text": text, "retry_count": 0})
+    result = get_app().invoke({"invoice_id": invoice_id, "invoice_text": text, "retry_count": 0})
     decision = result['final_decision']
     reasons = result.get('analysis_notes', [])
     
@@ -128,6 +141,7 @@ def process_attachment(filepath):
             
             if payment_result["status"] == "success":
                 print(f"💰 PAYMENT SENT! ID: {payment_result['transfer_id']}")
+                log_event(invoice_id, "PAYMENT_SENT", payment_result['transfer_id'])
                 log_to_ledger(
                     vendor_name=data.vendor_name,
                     amount=data.total_amount,
@@ -135,12 +149,16 @@ def process_attachment(filepath):
                     invoice_ref=data.po_number or "No-PO",
                     transfer_id=payment_result['transfer_id']
                 )
+                log_event(invoice_id, "LEDGER_POSTED", payment_result['transfer_id'])
                 move_file(filepath, PAID_DIR)
+                log_event(invoice_id, "MOVED", PAID_DIR)
                 print(f"📂 Moved to: {PAID_DIR}")
             else:
                 print(f"⚠️ Payment Failed: {payment_result.get('error')}")
+                log_event(invoice_id, "PAYMENT_FAILED", payment_result.get('error'))
                 send_slack_payment_error(os.path.basename(filepath), payment_result.get('error'))
                 move_file(filepath, FAILED_PAY_DIR)
+                log_event(invoice_id, "MOVED", FAILED_PAY_DIR)
                 print(f"📂 Moved to FAILED folder: {FAILED_PAY_DIR}")
 
 
@@ -157,9 +175,11 @@ def process_attachment(filepath):
             reason=decision,
             details=reason_text
         )
+        log_event(invoice_id, "SLACK_ALERT", f"{decision}: {reason_text}")
         
         target_folder = FAILED_PAY_DIR if decision == "DENY" else FLAGGED_DIR
         move_file(filepath, target_folder)
+        log_event(invoice_id, "MOVED", target_folder)
         print(f"📂 Moved to: {target_folder}")
 
 def check_email():
@@ -203,6 +223,7 @@ def check_email():
         print(f"⚠️ Error checking email: {e}")
 
 if __name__ == "__main__":
+    init()
     print(f"📡 Monitoring {EMAIL_USER} for Invoices...")
     print("   (Press Ctrl+C to stop)")
     while True:
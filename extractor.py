@@ -1,11 +1,12 @@
 import os
+import re
 import json
+import hashlib
+import threading
+from abc import ABC, abstractmethod
 from dotenv import load_dotenv
 from typing import Optional
 from pydantic import BaseModel, Field
-from langchain_google_genai import ChatGoogleGenerativeAI 
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
 
 load_dotenv()
 
@@ -17,35 +18,244 @@ class InvoiceData(BaseModel):
     date: str = Field(description="Invoice date in YYYY-MM-DD format")
     items: list[str] = Field(description="List of item descriptions")
 
-def extract_invoice_from_text(invoice_text: str) -> InvoiceData:
+
+def compact_format_instructions():
+    """
+    Short replacement for JsonOutputParser.get_format_instructions(), which embeds
+    the full JSON schema and costs several hundred tokens per call.
+    """
+    fields = ", ".join(
+        f'"{name}": {field.description}' for name, field in InvoiceData.model_fields.items()
+    )
+    return f"Reply with only a JSON object with keys: {fields}."
+
+
+# --- BACKENDS ---
+class ExtractorBackend(ABC):
+    """
+    Turns invoice text into InvoiceData. Subclasses implement `extract`.
+    `invoice_text` is what to read (possibly compacted); `source_text` is the
+    original document text, for backends that key on the raw invoice.
+    """
+    name = "base"
+
+    @abstractmethod
+    def extract(self, invoice_text: str, source_text: str = None) -> InvoiceData:
+        ...
+
+
+class GeminiBackend(ExtractorBackend):
     """
     Uses LangChain + Gemini to extract structured data from invoice text.
     """
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY missing in .env")
+    name = "gemini"
 
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        temperature=0,
-        google_api_key=api_key
-    )
+    def __init__(self, model="gemini-2.5-flash"):
+        self.model = model
 
-    parser = JsonOutputParser(pydantic_object=InvoiceData)
+    def extract(self, invoice_text: str, source_text: str = None) -> InvoiceData:
+        # Imported here so importing this module (e.g. for InvoiceData) stays cheap.
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_core.output_parsers import JsonOutputParser
 
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are an expert financial data extractor. Extract the following invoice data exactly."),
-        ("user", "Invoice Text:\n{invoice_text}\n\n{format_instructions}")
-    ])
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY missing in .env")
 
-    chain = prompt | llm | parser
+        llm = ChatGoogleGenerativeAI(
+            model=self.model,
+            temperature=0,
+            google_api_key=api_key
+        )
+
+        parser = JsonOutputParser(pydantic_object=InvoiceData)
+
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", "You are an expert financial data extractor. Extract the following invoice data exactly."),
+            ("user", "Invoice Text:\n{invoice_text}\n\n{format_instructions}")
+        ])
+
+        chain = prompt | llm | parser
 
-    try:
         result = chain.invoke({
             "invoice_text": invoice_text,
-            "format_instructions": parser.get_format_instructions()
+            "format_instructions": compact_format_instructions()
         })
         return InvoiceData(**result)
+
+
+class RulesBackend(ExtractorBackend):
+    """
+    Deterministic regex extractor. Runs on CPU with no network calls.
+    Understands the layout produced by createpdf.py and simple "Label: value" invoices.
+    """
+    name = "rules"
+
+    VENDOR_PATTERNS = [
+        r"INVOICE\s+from\s+(.+)",
+        r"(?:From|Vendor|Bill From)\s*:\s*(.+)",
+    ]
+    PO_PATTERN = r"\b(PO-\d+)\b"
+    DATE_PATTERN = r"Date\s*:\s*(\S+)"
+    AMOUNT = r"\s*:?\s*([$₹€£]|USD|INR|EUR|GBP)?\s*([\d,]+(?:\.\d+)?)(?:\s*(USD|INR|EUR|GBP)\b)?"
+    # Most specific label first; a bare "Total" never matches inside "Subtotal" / "Sub Total".
+    TOTAL_PATTERNS = [
+        r"\b(?:TOTAL DUE|Amount Due|Balance Due)\b" + AMOUNT,
+        r"(?<!sub)(?<!sub )(?<!sub-)\bTotal\b" + AMOUNT,
+    ]
+    ITEM_PATTERN = r"^(.+?)\s+(?:[$₹€£]\s?[\d,]+(?:\.\d+)?|[\d,]+\.\d{2}\s*(?:USD|INR|EUR|GBP))\s*$"
+    NON_ITEM_PATTERN = r"\b(?:description|sub\s*-?\s*total|total|tax|vat|gst|amount due|balance due)\b"
+    CURRENCIES = {"$": "USD", "₹": "INR", "€": "EUR", "£": "GBP"}
+
+    def extract(self, invoice_text: str, source_text: str = None) -> InvoiceData:
+        vendor = None
+        for pattern in self.VENDOR_PATTERNS:
+            match = re.search(pattern, invoice_text, re.IGNORECASE)
+            if match:
+                vendor = match.group(1).strip()
+                break
+
+        total = None
+        for pattern in self.TOTAL_PATTERNS:
+            total = re.search(pattern, invoice_text, re.IGNORECASE)
+            if total:
+                break
+        if not vendor or not total:
+            raise ValueError("Rules backend could not find vendor or total")
+
+        symbol = total.group(1) or total.group(3) or "$"
+        currency = self.CURRENCIES.get(symbol, symbol.upper())
+
+        po = re.search(self.PO_PATTERN, invoice_text, re.IGNORECASE)
+        date = re.search(self.DATE_PATTERN, invoice_text, re.IGNORECASE)
+
+        items = []
+        for line in invoice_text.splitlines():
+            line = line.strip()
+            if re.search(self.NON_ITEM_PATTERN, line, re.IGNORECASE):
+                continue
+            match = re.match(self.ITEM_PATTERN, line)
+            if match:
+                items.append(match.group(1).strip())
+
+        return InvoiceData(
+            vendor_name=vendor,
+            po_number=po.group(1).upper() if po else None,
+            total_amount=float(total.group(2).replace(",", "")),
+            currency=currency,
+            date=date.group(1) if date else "",
+            items=items,
+        )
+
+
+class ReplayBackend(ExtractorBackend):
+    """
+    Serves recorded responses keyed by a hash of the original (uncompacted) invoice text.
+    Record with EXTRACTOR_RECORD_FILE while running another backend.
+    """
+    name = "replay"
+
+    def __init__(self, replay_file=None):
+        self.replay_file = replay_file or os.getenv("EXTRACTOR_REPLAY_FILE", "extractor_recordings.jsonl")
+        self._responses = None
+
+    def _load(self):
+        if self._responses is None:
+            responses = {}
+            with open(self.replay_file) as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        # Later recordings of the same invoice win.
+                        responses[record["key"]] = record["data"]
+            self._responses = responses
+        return self._responses
+
+    def extract(self, invoice_text: str, source_text: str = None) -> InvoiceData:
+        key = text_hash(source_text or invoice_text)
+        response = self._load().get(key)
+        if response is None:
+            raise KeyError(f"No recorded response for invoice {key[:12]}")
+        return InvoiceData(**response)
+
+
+BACKENDS = {
+    GeminiBackend.name: GeminiBackend,
+    RulesBackend.name: RulesBackend,
+    ReplayBackend.name: ReplayBackend,
+}
+_backend_instances = {}
+_record_lock = threading.Lock()
+
+
+def text_hash(invoice_text):
+    return hashlib.sha256(invoice_text.encode("utf-8")).hexdigest()
+
+
+def get_backend(name):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown extractor backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    if name not in _backend_instances:
+        _backend_instances[name] = BACKENDS[name]()
+    return _backend_instances[name]
+
+
+def select_backend(invoice_text):
+    """
+    Picks the backend for this invoice.
+    EXTRACTOR_VENDOR_BACKENDS (JSON, e.g. {"Office Coffee Co": "rules"}) overrides per vendor
+    when the vendor name appears in the text; otherwise EXTRACTOR_BACKEND (default: gemini).
+    """
+    vendor_map = json.loads(os.getenv("EXTRACTOR_VENDOR_BACKENDS") or "{}")
+    lowered = invoice_text.lower()
+    for vendor, backend_name in vendor_map.items():
+        if vendor.lower() in lowered:
+            return get_backend(backend_name)
+    return get_backend(os.getenv("EXTRACTOR_BACKEND", GeminiBackend.name))
+
+
+def configured_backends():
+    """Every backend name this deployment can select: the default plus any per-vendor overrides."""
+    vendor_map = json.loads(os.getenv("EXTRACTOR_VENDOR_BACKENDS") or "{}")
+    return {os.getenv("EXTRACTOR_BACKEND", GeminiBackend.name), *vendor_map.values()}
+
+
+def requires_api_key():
+    return GeminiBackend.name in configured_backends()
+
+
+def record_response(invoice_text, data):
+    """
+    Appends one JSON line to EXTRACTOR_RECORD_FILE so ReplayBackend can serve it later.
+    A recording failure is logged and never fails the extraction.
+    """
+    record_file = os.getenv("EXTRACTOR_RECORD_FILE")
+    if not record_file or data is None:
+        return
+    line = json.dumps({"key": text_hash(invoice_text), "data": data.model_dump()})
+    try:
+        with _record_lock:
+            with open(record_file, "a") as f:
+                f.write(line + "\n")
+    except OSError as e:
+        print(f"⚠️ Could not record extraction to {record_file}: {e}")
+
+
+def extract_invoice_from_text(invoice_text: str, source_text: str = None) -> InvoiceData:
+    """
+    Extracts structured data from invoice text using the configured backend.
+    `source_text` is the raw text before compaction; recordings are keyed on it so
+    they survive changes to the compactor or EXTRACTION_TOKEN_BUDGET.
+    """
+    source_text = source_text or invoice_text
+    backend = select_backend(source_text)
+
+    try:
+        data = backend.extract(invoice_text, source_text=source_text)
     except Exception as e:
-        print(f"❌ Extraction Error: {e}")
-        return None
\ No newline at end of file
+        print(f"❌ Extraction Error ({backend.name}): {e}")
+        return None
+
+    record_response(source_text, data)
+    return data
@@ -1,9 +1,7 @@
-import stripe
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
-stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 
 def normalize_currency(currency_input):
     """
@@ -24,6 +22,9 @@ def normalize_currency(currency_input):
 
 def process_payment(amount, currency, vendor_name, invoice_ref):
     try:
+        import stripe
+        stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
+
         stripe_currency = normalize_currency(currency)
         
         # 2. Convert to cents
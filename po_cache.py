@@ -0,0 +1,139 @@
+import sqlite3
+import threading
+
+DB_PATH = 'ap_database.db'
+
+# A single-row counter bumped by triggers whenever vendors or purchase_orders change.
+# PRAGMA data_version alone is not enough: it also moves on audit_log and invoice writes.
+CHANGE_COUNTER_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS catalog_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    )""",
+    "INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0)",
+] + [
+    f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_{op.lower()}_version
+        AFTER {op} ON {table}
+        BEGIN UPDATE catalog_version SET version = version + 1 WHERE id = 1; END"""
+    for table in ("vendors", "purchase_orders")
+    for op in ("INSERT", "UPDATE", "DELETE")
+]
+
+
+def create_change_triggers(cursor):
+    for statement in CHANGE_COUNTER_SCHEMA:
+        cursor.execute(statement)
+
+
+# --- 1. RECORDS ---
+class Vendor:
+    __slots__ = ("vendor_id", "name", "trust_score", "typical_price")
+
+    def __init__(self, vendor_id, name, trust_score, typical_price):
+        self.vendor_id = vendor_id
+        self.name = name
+        self.trust_score = trust_score
+        self.typical_price = typical_price
+
+
+class PurchaseOrder:
+    __slots__ = ("po_number", "vendor_id", "item_description", "quantity",
+                 "agreed_price_per_unit", "total_amount", "status")
+
+    def __init__(self, po_number, vendor_id, item_description, quantity,
+                 agreed_price_per_unit, total_amount, status):
+        self.po_number = po_number
+        self.vendor_id = vendor_id
+        self.item_description = item_description
+        self.quantity = quantity
+        self.agreed_price_per_unit = agreed_price_per_unit
+        self.total_amount = total_amount
+        self.status = status
+
+
+class Snapshot:
+    """Immutable view of open POs and vendors. Replaced wholesale on reload, never mutated."""
+    __slots__ = ("version", "purchase_orders", "vendors", "vendor_names")
+
+    def __init__(self, version, purchase_orders, vendors):
+        self.version = version
+        self.purchase_orders = purchase_orders  # po_number -> PurchaseOrder
+        self.vendors = vendors                  # vendor_id -> Vendor
+        self.vendor_names = [v.name for v in vendors.values()]
+
+
+# --- 2. CACHE ---
+class CatalogCache:
+    """
+    Read-through cache of open purchase orders and vendors.
+    Each lookup checks PRAGMA data_version (an in-memory counter, no table read).
+    Only if another connection has committed does it read catalog_version, and
+    it reloads the snapshot only when that counter moved.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._data_version = None
+        self._snapshot = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        try:
+            create_change_triggers(conn.cursor())
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ PO Cache: could not install change triggers: {e}")
+        return conn
+
+    def _load(self, version):
+        cursor = self._conn.cursor()
+        vendors = {
+            row[0]: Vendor(*row)
+            for row in cursor.execute("SELECT vendor_id, name, trust_score, typical_price FROM vendors")
+        }
+        purchase_orders = {
+            row[0]: PurchaseOrder(*row)
+            for row in cursor.execute(
+                "SELECT po_number, vendor_id, item_description, quantity, agreed_price_per_unit, total_amount, status "
+                "FROM purchase_orders WHERE status = 'OPEN'"
+            )
+        }
+        print(f"🗂️ PO Cache: loaded {len(purchase_orders)} open POs, {len(vendors)} vendors (v{version})")
+        return Snapshot(version, purchase_orders, vendors)
+
+    def snapshot(self):
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if self._snapshot is not None and data_version == self._data_version:
+                return self._snapshot
+
+            # Read counter and rows in one transaction so they agree with each other.
+            self._conn.execute("BEGIN")
+            try:
+                version = self._conn.execute("SELECT version FROM catalog_version WHERE id = 1").fetchone()[0]
+                if self._snapshot is None or version != self._snapshot.version:
+                    self._snapshot = self._load(version)
+            finally:
+                self._conn.execute("COMMIT")
+            self._data_version = data_version
+            return self._snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+
+_cache = CatalogCache()
+
+
+def get_snapshot():
+    return _cache.snapshot()
+
+
+def invalidate():
+    _cache.invalidate()
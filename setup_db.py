@@ -1,4 +1,6 @@
 import sqlite3
+from audit_log import create_audit_indexes
+from po_cache import create_change_triggers
 
 def create_database():
     conn = sqlite3.connect("ap_database.db")
@@ -54,6 +56,10 @@ def create_database():
         timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
     )
     """)
+    create_audit_indexes(cursor)
+    create_change_triggers(cursor)
+    # catalog_version is kept across reseeds so running caches never see a reused version.
+    cursor.execute("UPDATE catalog_version SET version = version + 1 WHERE id = 1")
 
     print("Seeding dummy data with anomaly baselines...")
 
@@ -1,33 +1,24 @@
-import sqlite3
 from pydantic import BaseModel
-from thefuzz import process
 import os
+from po_cache import get_snapshot
 
-# --- 1. CONNECT TO DB ---
-def get_db_connection():
-    conn = sqlite3.connect('ap_database.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
-# --- 2. DEFINE THE RESULT ---
+# --- 1. DEFINE THE RESULT ---
 class ValidationResult(BaseModel):
     is_valid: bool
     errors: list[str] = []
     status: str
 
-# --- 3. HELPER: FUZZY VENDOR MATCH ---
-def find_best_vendor_match(scanned_name, cursor):
-    # Get all valid vendor names
-    all_vendors = cursor.execute("SELECT name FROM vendors").fetchall()
-    vendor_names = [row['name'] for row in all_vendors]
-    
+# --- 2. HELPER: FUZZY VENDOR MATCH ---
+def find_best_vendor_match(scanned_name, vendor_names):
+    from thefuzz import process
+
     # Find closest match
     if not vendor_names: return None, 0
     
     match, score = process.extractOne(scanned_name, vendor_names)
     return match, score
 
-# --- 4. HELPER: LINE ITEM CHECK ---
+# --- 3. HELPER: LINE ITEM CHECK ---
 def check_line_items(invoice_items, po_description):
     """
     Returns True if at least one word from the PO description 
@@ -48,14 +39,14 @@ def check_line_items(invoice_items, po_description):
     return matches > 0
 
 def validate_invoice(invoice_data):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    # Open POs and vendors come from the in-memory snapshot, not per-call SQL.
+    snapshot = get_snapshot()
     errors = []
     
     print(f"🔍 Validating Invoice for PO: {invoice_data.po_number}...")
 
     # RULE 1: Check Vendor (Fuzzy Match)
-    match_name, score = find_best_vendor_match(invoice_data.vendor_name, cursor)
+    match_name, score = find_best_vendor_match(invoice_data.vendor_name, snapshot.vendor_names)
     if score < 85:
         errors.append(f"❌ Vendor '{invoice_data.vendor_name}' not found. (Best match: {match_name} @ {score}%)")
     else:
@@ -63,23 +54,21 @@ def validate_invoice(invoice_data):
 
     # RULE 2: Check PO Existence & Line Items
     if invoice_data.po_number:
-        po = cursor.execute("SELECT * FROM purchase_orders WHERE po_number = ?", (invoice_data.po_number,)).fetchone()
+        po = snapshot.purchase_orders.get(invoice_data.po_number)
         
         if not po:
-            errors.append(f"❌ PO Number '{invoice_data.po_number}' does not exist.")
+            errors.append(f"❌ PO Number '{invoice_data.po_number}' does not exist or is not OPEN.")
         else:
             # RULE 3: Price Check
-            if abs(invoice_data.total_amount - po['total_amount']) > 1.0: 
-                errors.append(f"⚠️ Price Mismatch: Invoice ${invoice_data.total_amount} vs PO ${po['total_amount']}")
+            if abs(invoice_data.total_amount - po.total_amount) > 1.0: 
+                errors.append(f"⚠️ Price Mismatch: Invoice ${invoice_data.total_amount} vs PO ${po.total_amount}")
             
             # RULE 4: Line Item Check
-            if not check_line_items(invoice_data.items, po['item_description']):
-                 errors.append(f"⚠️ Item Mismatch: Invoice items {invoice_data.items} do not match PO description '{po['item_description']}'")
+            if not check_line_items(invoice_data.items, po.item_description):
+                 errors.append(f"⚠️ Item Mismatch: Invoice items {invoice_data.items} do not match PO description '{po.item_description}'")
     else:
         errors.append("⚠️ Missing PO Number on invoice.")
 
-    conn.close()
-
     # --- RULE 5: Auto-Approval Limit Check (Corrected variable name) ---
     max_limit = float(os.getenv("MAX_AUTO_PAY_LIMIT", 2000.0))
     if invoice_data.total_amount > max_limit: